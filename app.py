@@ -1,55 +1,368 @@
 import os
+import sys
 import json
 import hashlib
 import threading
+import glob
+import shutil
+import zlib
 import time
-import requests
+import bisect
+import heapq
+import random
 import re
+import functools
+import itertools
+import enum
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, render_template_string, session, redirect, url_for
-from cryptography.fernet import Fernet
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+# ================= STARTUP TIMING =================
+# Everything expensive (cipher, HTTP session, templates, data check, worker)
+# is built on first use so a serverless cold start only pays for Flask.
+# Each stage's cost is recorded, see startup_report() or
+# `python app.py --startup-report`.
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "0"))
+startup_timings = []
+_module_started = time.perf_counter()
+
+@contextmanager
+def startup_stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        startup_timings.append((name, (time.perf_counter() - started) * 1e6))
+
+def startup_report():
+    lines = ["startup time: self [us] | stage"]
+    lines += [f"startup time: {us:>9.0f} | {name}" for name, us in startup_timings]
+    return "\n".join(lines)
+
+with startup_stage("import flask"):
+    from flask import Flask, request, jsonify, render_template_string, session, redirect, url_for
 
 app = Flask(__name__)
 app.secret_key = os.urandom(24)  # Change to a fixed string in production
 
 # ================= ENCRYPTION SETUP =================
 ENCRYPTION_KEY_FILE = "encryption.key"
+_cipher = None
 
 def get_encryption_key():
+    from cryptography.fernet import Fernet
     if not os.path.exists(ENCRYPTION_KEY_FILE):
         key = Fernet.generate_key()
-        with open(ENCRYPTION_KEY_FILE, "wb") 
-    as f:
+        with open(ENCRYPTION_KEY_FILE, "wb") as f:
             f.write(key)
         return key
     else:
         with open(ENCRYPTION_KEY_FILE, "rb") as f:
             return f.read()
 
-cipher = Fernet(get_encryption_key())
+def get_cipher():
+    global _cipher
+    if _cipher is None:
+        with startup_stage("cipher"):
+            from cryptography.fernet import Fernet
+            _cipher = Fernet(get_encryption_key())
+    return _cipher
 
 def encrypt_api_key(plain_key):
-    return cipher.encrypt(plain_key.encode()).decode()
+    return get_cipher().encrypt(plain_key.encode()).decode()
 
 def decrypt_api_key(encrypted_key):
-    return cipher.decrypt(encrypted_key.encode()).decode()
+    return get_cipher().decrypt(encrypted_key.encode()).decode()
+
+# ================= HTTP SESSION =================
+_http = None
+
+def http():
+    global _http
+    if _http is None:
+        with startup_stage("http session"):
+            import requests
+            _http = requests.Session()
+    return _http
 
 # ================= CONFIGURATION =================
 API_URL = "https://smmgen.com/api/v2"
+DEFAULT_PROVIDER = "smmgen"
+PROVIDERS_FILE = "providers.json"  # {"name": "https://.../api/v2", ...}
+SERVICE_MAP_FILE = "service_map.json"  # [{"smmgen": "123", "other": "456"}, ...]
+SMM_API_TIMEOUT = 30  # seconds
 USERS_FILE = "users.json"
 AUTOMATION_INTERVAL = 60  # seconds
+AUTOMATION_TICK = 5  # seconds between scheduler passes
+ORDER_COOLDOWN = 600  # seconds between re-orders of one task
+CATCHUP_WINDOW = 300  # seconds over which overdue tasks are spread after a restart
+CHECKPOINT_INTERVAL = 30  # seconds
+# "thread" runs the automation loop inside the web process, "external"
+# leaves it to worker.py. Serverless deployments never start the thread,
+# whatever AUTOMATION_MODE says.
+SERVERLESS = bool(os.environ.get("VERCEL") or os.environ.get("AWS_LAMBDA_FUNCTION_NAME"))
+AUTOMATION_MODE = "external" if SERVERLESS else os.environ.get("AUTOMATION_MODE", "thread")
+
+# ================= ORDER & TASK MODEL =================
+# Orders and tasks are plain slotted objects in memory, with epoch-second
+# timestamps and Status members. The JSON storage format (ISO timestamps,
+# status labels) is only touched by from_dict/to_dict in the file helpers
+# and when building API responses.
+class Status(enum.IntEnum):
+    PENDING = 0
+    IN_PROGRESS = 1
+    PROCESSING = 2
+    COMPLETED = 3
+    PARTIAL = 4
+    CANCELED = 5
+    REFUNDED = 6
+
+STATUS_LABELS = {
+    Status.PENDING: "Pending",
+    Status.IN_PROGRESS: "In progress",
+    Status.PROCESSING: "Processing",
+    Status.COMPLETED: "Completed",
+    Status.PARTIAL: "Partial",
+    Status.CANCELED: "Canceled",
+    Status.REFUNDED: "Refunded"
+}
+_STATUS_BY_LABEL = {label: status for status, label in STATUS_LABELS.items()}
+FINISHED_STATUSES = (Status.COMPLETED, Status.PARTIAL, Status.CANCELED, Status.REFUNDED)
+
+def parse_status(label):
+    # Statuses the panel doesn't know about are kept verbatim
+    return _STATUS_BY_LABEL.get(label, label)
+
+def status_label(status):
+    return STATUS_LABELS.get(status, status)
+
+def parse_timestamp(value):
+    return int(datetime.fromisoformat(value).timestamp())
+
+def format_timestamp(ts):
+    return datetime.fromtimestamp(ts).isoformat()
+
+def parse_int(value, field, record_id):
+    # Older records hold whatever the client sent; keep it verbatim rather
+    # than failing the whole file
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        app.logger.warning("Keeping non-integer %s %r of %s", field, value, record_id)
+        return value
+
+# Wall clock for everything time-based in the automation engine;
+# simulate.py swaps it for a virtual clock
+clock = time.time
+
+def now_ts():
+    return int(clock())
+
+class Order:
+    __slots__ = ("order_id", "service", "link", "quantity", "status", "remains", "created_at",
+                 "provider", "provider_service", "provider_order_id", "charge", "charge_bdt", "refunded")
+
+    def __init__(self, order_id, service, link, quantity, status=Status.PENDING, remains=None, created_at=None,
+                 provider=None, provider_service=None, provider_order_id=None, charge=0.0, charge_bdt=0.0, refunded=0.0):
+        self.order_id = order_id
+        self.service = service
+        self.link = link
+        self.quantity = quantity
+        self.status = status
+        self.remains = remains
+        self.created_at = created_at if created_at is not None else now_ts()
+        self.provider = provider
+        self.provider_service = provider_service
+        self.provider_order_id = provider_order_id
+        self.charge = charge
+        self.charge_bdt = charge_bdt
+        self.refunded = refunded
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            str(d["order_id"]), d.get("service"), d.get("link"), parse_int(d.get("quantity"), "quantity", d["order_id"]),
+            status=parse_status(d.get("status", "Pending")),
+            remains=d.get("remains"),
+            created_at=parse_timestamp(d["created_at"]) if d.get("created_at") else 0,
+            provider=d.get("provider"),
+            provider_service=d.get("provider_service"),
+            provider_order_id=d.get("provider_order_id"),
+            charge=d.get("charge", 0.0),
+            charge_bdt=d.get("charge_bdt", 0.0),
+            refunded=d.get("refunded", 0.0)
+        )
+
+    def to_dict(self):
+        d = {
+            "order_id": self.order_id,
+            "service": self.service,
+            "link": self.link,
+            "quantity": self.quantity,
+            "status": status_label(self.status),
+            "created_at": format_timestamp(self.created_at)
+        }
+        for field in ("remains", "provider", "provider_service", "provider_order_id"):
+            value = getattr(self, field)
+            if value is not None:
+                d[field] = value
+        for field in ("charge", "charge_bdt", "refunded"):
+            value = getattr(self, field)
+            if value:
+                d[field] = value
+        return d
+
+class Task:
+    __slots__ = ("order_id", "service", "link", "quantity", "target", "last_views", "last_order_time", "active", "created_at")
+
+    def __init__(self, order_id, service, link, quantity, target, last_views=0, last_order_time=None, active=True,
+                 created_at=None):
+        self.order_id = order_id
+        self.service = service
+        self.link = link
+        self.quantity = quantity
+        self.target = target
+        self.last_views = last_views
+        self.last_order_time = last_order_time
+        self.active = active
+        self.created_at = created_at if created_at is not None else now_ts()
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(
+            str(d["order_id"]), d.get("service"), d.get("link"),
+            parse_int(d.get("quantity"), "quantity", d["order_id"]), parse_int(d.get("target"), "target", d["order_id"]),
+            last_views=d.get("last_views", 0),
+            last_order_time=parse_timestamp(d["last_order_time"]) if d.get("last_order_time") else None,
+            active=bool(d.get("active")),
+            created_at=parse_timestamp(d["created_at"]) if d.get("created_at") else 0
+        )
+
+    def runnable(self):
+        # Tasks with a quantity or target that isn't a number are kept but
+        # never scheduled
+        return self.active and isinstance(self.quantity, int) and isinstance(self.target, int)
+
+    def to_dict(self):
+        return {
+            "order_id": self.order_id,
+            "service": self.service,
+            "link": self.link,
+            "quantity": self.quantity,
+            "target": self.target,
+            "last_views": self.last_views,
+            "last_order_time": format_timestamp(self.last_order_time) if self.last_order_time else None,
+            "active": self.active,
+            "created_at": format_timestamp(self.created_at)
+        }
 
 # ================= FILE HELPERS =================
-def load_users():
+# Per-user files are guarded by striped locks: different users proceed in
+# parallel, writers to the same user are serialized. The stripes also take
+# an flock on .locks/<stripe>.lock so the web app and worker.py processes
+# exclude each other. Every write goes to a temp file first and is renamed
+# into place; the previous version is kept as <file>.bak so a damaged file
+# can be recovered.
+LOCK_STRIPES = 64
+LOCK_DIR = ".locks"
+STALE_TMP_SECONDS = 300
+DATA_FILE_PATTERNS = (USERS_FILE, "orders_*.json", "automation_*.json", "stats_*.json", "checkpoint_*.json")
+
+class StripeLock:
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def __enter__(self):
+        self.lock.acquire()
+        if self.depth == 0 and fcntl is not None:
+            os.makedirs(LOCK_DIR, exist_ok=True)
+            self.handle = open(os.path.join(LOCK_DIR, f"{self.name}.lock"), "a")
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is not None:
+            _model_cache.clear()  # may hold changes that were never saved
+        self.depth -= 1
+        if self.depth == 0 and self.handle:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+        self.lock.release()
+
+_user_locks = [StripeLock(i) for i in range(LOCK_STRIPES)]
+users_lock = StripeLock("users")
+checkpoint_lock = StripeLock("checkpoints")
+
+def user_lock(username):
+    return _user_locks[zlib.crc32(username.encode()) % LOCK_STRIPES]
+
+# (mtime_ns, size) of the last version of each file known to parse, so a
+# write can keep it as the backup without parsing it again
+_good_files = {}
+
+def _file_signature(st):
+    return (st.st_mtime_ns, st.st_size)
+
+def read_json(path, default):
+    for candidate in (path, path + ".bak"):
+        try:
+            with open(candidate, "r") as f:
+                data = json.load(f)
+                if candidate == path:
+                    _good_files[path] = _file_signature(os.fstat(f.fileno()))
+                return data
+        except FileNotFoundError:
+            continue
+        except json.JSONDecodeError:
+            app.logger.warning("Corrupt data file %s", candidate)
+    return default
+
+def _backup_current(path, tmp):
+    # Hard-links the current version to <file>.bak, unless it is corrupt:
+    # the backup must stay the last good copy
     try:
-        with open(USERS_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {}
+        signature = _file_signature(os.stat(path))
+    except FileNotFoundError:
+        return
+    if _good_files.get(path) != signature and not is_valid_json(path):
+        app.logger.warning("Not backing up corrupt %s", path)
+        return
+    bak_tmp = tmp + ".bak.tmp"
+    try:
+        os.link(path, bak_tmp)
+    except OSError:  # no hard links on this filesystem
+        shutil.copyfile(path, bak_tmp)
+    os.replace(bak_tmp, path + ".bak")
+
+def write_json(path, data, indent=2):
+    # The main file is replaced in a single rename, so readers always see
+    # either the old or the new version
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp + ".tmp", "w") as f:
+        # dumps rather than dump: only the one-shot encoder runs in C
+        f.write(json.dumps(data, indent=indent))
+        f.flush()
+        os.fsync(f.fileno())
+        signature = _file_signature(os.fstat(f.fileno()))
+    _backup_current(path, tmp)
+    os.replace(tmp + ".tmp", path)
+    _good_files[path] = signature
+
+def load_users():
+    return read_json(USERS_FILE, {})
 
 def save_users(users):
-    with open(USERS_FILE, "w") as f:
-        json.dump(users, f, indent=2)
+    write_json(USERS_FILE, users)
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -60,42 +373,133 @@ def get_user_orders_file(username):
 def get_user_automation_file(username):
     return f"automation_{username}.json"
 
-def load_user_orders(username):
+# Orders, tasks and stats are kept as loaded objects between requests and
+# worker passes, keyed by the file's signature, so a file is only parsed and
+# converted again after another process has rewritten it. The objects are
+# shared: change them only under the user's lock and save afterwards (a lock
+# left by an exception drops the cache).
+MODEL_CACHE_SIZE = 256  # files
+_model_cache = {}
+
+def _remember(path, signature, value):
+    _model_cache.pop(path, None)
+    _model_cache[path] = (signature, value)
+    while len(_model_cache) > MODEL_CACHE_SIZE:
+        del _model_cache[next(iter(_model_cache))]
+
+def load_cached(path, default, build):
     try:
-        with open(get_user_orders_file(username), "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+        signature = _file_signature(os.stat(path))
+    except FileNotFoundError:
+        signature = None
+    cached = _model_cache.get(path)
+    if cached and signature and cached[0] == signature:
+        return cached[1]
+    value = build(read_json(path, default))
+    # Only cache what was read from this exact version of the main file
+    if signature and _good_files.get(path) == signature:
+        _remember(path, signature, value)
+    return value
+
+def store_cached(path, data, value):
+    write_json(path, data, indent=None)
+    if path in _good_files:
+        _remember(path, _good_files[path], value)
+
+def load_records(cls, data, path):
+    # A record that can't be read at all is skipped and logged instead of
+    # failing the whole account
+    records = []
+    for d in data:
+        try:
+            records.append(cls.from_dict(d))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            app.logger.error("Skipping unreadable record in %s: %r (%s)", path, d, e)
+    return records
+
+def load_user_orders(username):
+    path = get_user_orders_file(username)
+    return list(load_cached(path, [], lambda data: load_records(Order, data, path)))
 
 def save_user_orders(username, orders):
-    with open(get_user_orders_file(username), "w") as f:
-        json.dump(orders, f, indent=2)
+    store_cached(get_user_orders_file(username), [o.to_dict() for o in orders], list(orders))
 
 def load_user_automation(username):
-    try:
-        with open(get_user_automation_file(username), "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    path = get_user_automation_file(username)
+    return list(load_cached(path, [], lambda data: load_records(Task, data, path)))
 
 def save_user_automation(username, tasks):
-    with open(get_user_automation_file(username), "w") as f:
-        json.dump(tasks, f, indent=2)
+    store_cached(get_user_automation_file(username), [t.to_dict() for t in tasks], list(tasks))
+
+def is_valid_json(path):
+    try:
+        with open(path, "r") as f:
+            json.load(f)
+        return True
+    except (OSError, json.JSONDecodeError):
+        return False
+
+def data_file_lock(path):
+    # The lock its writers hold, so recovery never races a write
+    if path == USERS_FILE:
+        return users_lock
+    for prefix in ("orders_", "automation_", "stats_"):
+        if path.startswith(prefix):
+            return user_lock(path[len(prefix):-len(".json")])
+    return checkpoint_lock
+
+def check_data_files(full=True):
+    # full=False only looks at file sizes, so it is cheap enough for a cold
+    # start: stale temp files are removed and missing or empty files are
+    # restored from their backup. full=True also parses every file.
+    paths = set()
+    for pattern in DATA_FILE_PATTERNS:
+        for tmp in glob.glob(pattern + ".*.tmp"):
+            try:
+                if time.time() - os.path.getmtime(tmp) > STALE_TMP_SECONDS:
+                    os.remove(tmp)
+            except FileNotFoundError:
+                pass
+        paths.update(glob.glob(pattern))
+        paths.update(p[:-4] for p in glob.glob(pattern + ".bak"))
+    for path in sorted(paths):
+        if not full:
+            try:
+                if os.path.getsize(path) > 0:
+                    continue
+            except FileNotFoundError:
+                pass
+        with data_file_lock(path):
+            if is_valid_json(path):
+                continue
+            bak = path + ".bak"
+            if os.path.exists(path):
+                os.replace(path, path + ".corrupt")
+            if is_valid_json(bak):
+                shutil.copyfile(bak, path)
+                app.logger.warning("Recovered %s from last good copy", path)
+            else:
+                app.logger.error("Could not recover %s, corrupt copy kept as %s.corrupt", path, path)
 
 # ================= CURRENCY & HELPERS =================
+RATE_CACHE_TTL = 600  # seconds
+_live_rate = {"value": None, "fetched": 0}
+
 def get_live_rate():
+    if _live_rate["value"] is not None and time.time() - _live_rate["fetched"] < RATE_CACHE_TTL:
+        return _live_rate["value"]
     try:
-        r = requests.get("https://open.er-api.com/v6/latest/USD", timeout=5).json()
-        return r["rates"]["BDT"]
+        r = http().get("https://open.er-api.com/v6/latest/USD", timeout=5).json()
+        _live_rate["value"] = r["rates"]["BDT"]
+        _live_rate["fetched"] = time.time()
+        return _live_rate["value"]
     except:
-        return 122.0
+        return _live_rate["value"] or 122.0
 
 # ================= ORIGINAL TIKTOK ANALYSIS =================
 def resolve_url(url):
     try:
-        session = requests.Session()
-        session.headers.update({"User-Agent": "Mozilla/5.0"})
-        response = session.get(url, allow_redirects=True, timeout=10)
+        response = http().get(url, headers={"User-Agent": "Mozilla/5.0"}, allow_redirects=True, timeout=10)
         return response.url
     except:
         return url
@@ -111,7 +515,7 @@ def get_video_views(link):
     url = f"https://www.tiktok.com/@any/video/{video_id}"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http().get(url, headers=headers, timeout=15)
         match = re.search(r'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__".*?>(.*?)</script>', response.text)
         if not match:
             return None
@@ -122,12 +526,388 @@ def get_video_views(link):
         return None
 
 # ================= API CALLS WITH USER'S KEY =================
-def call_smm_api(api_key, action, **params):
+def request_not_sent(error):
+    # True only when the connection failed before anything was sent
+    import requests
+    from urllib3.exceptions import NewConnectionError
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+def call_smm_api(api_key, action, provider=DEFAULT_PROVIDER, **params):
+    # Never fall back to another host: that would send this provider's key there
+    url = get_providers().get(provider)
+    if url is None:
+        return {"error": "Unknown provider"}
     data = {"key": api_key, "action": action, **params}
+    started = time.perf_counter()
     try:
-        return requests.post(API_URL, data=data).json()
-    except:
+        r = http().post(url, data=data, timeout=SMM_API_TIMEOUT).json()
+    except Exception as e:
+        record_provider_call(provider, time.perf_counter() - started, False)
+        if action == "add" and not request_not_sent(e):
+            # The provider may have taken (and charged for) the order; it
+            # must not be placed anywhere else
+            app.logger.error("Order outcome unknown at %s for %s x%s: %s",
+                             provider, params.get("link"), params.get("quantity"), type(e).__name__)
+            return {"error": "The provider did not confirm the order, check your order list there before retrying",
+                    "outcome": "unknown"}
         return {"error": "API request failed"}
+    # Only failed orders count against a provider; a bad key on "balance"
+    # says nothing about the upstream's health
+    ok = not (action == "add" and isinstance(r, dict) and "error" in r)
+    record_provider_call(provider, time.perf_counter() - started, ok)
+    return r
+
+# ================= PROVIDER ROUTING =================
+# Providers come from PROVIDERS_FILE on top of the built-in smmgen endpoint.
+# Users keep their smmgen key in "api_key" and extra keys under "providers".
+# SERVICE_MAP_FILE groups equivalent services; an order for a smmgen service
+# is sent to whichever provider in its group scores best on price, rolling
+# latency and error rate, falling through to the next one on failure.
+HEALTH_WINDOW = 50  # calls per provider
+LATENCY_TARGET = 2.0  # seconds
+ERROR_PENALTY = 4.0
+provider_health = {}
+_config_files = {}
+
+def load_config_file(path, default, build=None):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return build(default) if build else default
+    cached = _config_files.get(path)
+    if not cached or cached["mtime"] != mtime:
+        data = read_json(path, default)
+        cached = _config_files[path] = {"mtime": mtime, "value": build(data) if build else data}
+    return cached["value"]
+
+def get_providers():
+    return {**load_config_file(PROVIDERS_FILE, {}), DEFAULT_PROVIDER: API_URL}
+
+def _index_service_map(groups):
+    index = {}
+    for group in groups:
+        group = {name: str(service) for name, service in group.items()}
+        for name, service in group.items():
+            index[(name, service)] = group
+    return index
+
+def equivalent_services(service, provider=DEFAULT_PROVIDER):
+    index = load_config_file(SERVICE_MAP_FILE, [], _index_service_map)
+    return index.get((provider, str(service))) or {provider: str(service)}
+
+def record_provider_call(provider, latency, ok):
+    provider_health.setdefault(provider, deque(maxlen=HEALTH_WINDOW)).append((latency, ok))
+
+def get_provider_health(provider):
+    calls = list(provider_health.get(provider, ()))
+    if not calls:
+        return {"calls": 0, "latency": 0.0, "error_rate": 0.0}
+    return {
+        "calls": len(calls),
+        "latency": round(sum(c[0] for c in calls) / len(calls), 3),
+        "error_rate": round(sum(1 for c in calls if not c[1]) / len(calls), 3)
+    }
+
+def get_user_provider_keys(user_data):
+    keys = {DEFAULT_PROVIDER: decrypt_api_key(user_data["api_key"])}
+    for name, encrypted_key in user_data.get("providers", {}).items():
+        keys[name] = decrypt_api_key(encrypted_key)
+    return keys
+
+def rank_providers(keys, service):
+    providers = get_providers()
+    ranked = []
+    for name, provider_service in equivalent_services(service).items():
+        if name not in keys or name not in providers:
+            continue
+        rate = get_service_rate(keys[name], provider_service, name)
+        if not rate:
+            continue  # catalog unavailable or service not offered
+        health = get_provider_health(name)
+        score = rate * (1 + health["latency"] / LATENCY_TARGET) * (1 + ERROR_PENALTY * health["error_rate"])
+        ranked.append((score, name, provider_service))
+    ranked.sort()
+    if not ranked:
+        return [(DEFAULT_PROVIDER, str(service))]
+    return [(name, provider_service) for _, name, provider_service in ranked]
+
+def place_order(keys, service, link, quantity):
+    # Returns (response, provider, provider_service, order_id)
+    resp = {"error": "No provider available"}
+    for name, provider_service in rank_providers(keys, service):
+        resp = call_smm_api(keys[name], "add", provider=name, service=provider_service, link=link, quantity=quantity)
+        if "order" in resp:
+            order_id = str(resp["order"]) if name == DEFAULT_PROVIDER else f"{name}:{resp['order']}"
+            return resp, name, provider_service, order_id
+        if resp.get("outcome") == "unknown":
+            # "add" isn't idempotent: only fall through after a clear failure
+            return resp, name, provider_service, None
+    return resp, None, None, None
+
+def fetch_order_statuses(keys, orders):
+    # Returns {order_id: status dict}, asking each provider about its own
+    # orders. Orders of providers no longer configured are left alone.
+    providers = get_providers()
+    by_provider = {}
+    for o in orders:
+        by_provider.setdefault(o.provider or DEFAULT_PROVIDER, []).append(o)
+    statuses = {}
+    for name, provider_orders in by_provider.items():
+        if name not in keys or name not in providers:
+            continue
+        ids = {o.provider_order_id or o.order_id: o.order_id for o in provider_orders}
+        r = call_smm_api(keys[name], "status", provider=name, orders=",".join(ids))
+        for provider_order_id, order_id in ids.items():
+            if isinstance(r.get(provider_order_id), dict):
+                statuses[order_id] = r[provider_order_id]
+    return statuses
+
+# ================= SERVICES CACHE =================
+SERVICES_CACHE_TTL = 300  # seconds
+SERVICES_CACHE_KEYS = 1000  # API keys remembered, oldest fetch evicted first
+# Users of one provider almost always see the same catalog, so the catalog,
+# rates and search index are stored once per (provider, signature) and each
+# key only points at one. Catalogs no key points at are dropped.
+_services_cache = {}  # (provider, api_key) -> {"catalog": (provider, signature), "fetched": ts}
+_catalogs = {}  # (provider, signature) -> {"services": [...], "rates": {...}, "index": {...}}
+
+def get_catalog(api_key, provider=DEFAULT_PROVIDER):
+    entry = _services_cache.get((provider, api_key))
+    return _catalogs.get(entry["catalog"]) if entry else None
+
+def get_services(api_key, provider=DEFAULT_PROVIDER):
+    key = (provider, api_key)
+    entry = _services_cache.get(key)
+    cached = _catalogs.get(entry["catalog"]) if entry else None
+    if cached and time.time() - entry["fetched"] < SERVICES_CACHE_TTL:
+        return cached["services"]
+    services = call_smm_api(api_key, "services", provider=provider)
+    if not isinstance(services, list):
+        return cached["services"] if cached else services
+    catalog = (provider, hashlib.sha1(json.dumps(services, sort_keys=True).encode()).hexdigest())
+    current = _catalogs.get(catalog)
+    if current is None:
+        current = _catalogs[catalog] = {
+            "services": services,
+            "rates": {str(s.get("service")): float(s.get("rate") or 0) for s in services},
+            "index": build_search_index(services)
+        }
+    _services_cache.pop(key, None)
+    _services_cache[key] = {"catalog": catalog, "fetched": time.time()}
+    while len(_services_cache) > SERVICES_CACHE_KEYS:
+        _services_cache.pop(next(iter(_services_cache)), None)
+    if current is not cached:
+        live = {e["catalog"] for e in list(_services_cache.values())}
+        for old in [c for c in list(_catalogs) if c not in live]:
+            _catalogs.pop(old, None)
+    return current["services"]
+
+def get_service_rate(api_key, service, provider=DEFAULT_PROVIDER):
+    get_services(api_key, provider)
+    cached = get_catalog(api_key, provider)
+    if not cached:
+        return 0.0
+    return cached["rates"].get(str(service), 0.0)
+
+def price_order(api_key, service, quantity, provider=DEFAULT_PROVIDER):
+    usd = round(get_service_rate(api_key, service, provider) * int(quantity) / 1000, 6)
+    return usd, round(usd * get_live_rate(), 4)
+
+# ================= SERVICE SEARCH =================
+# The index is rebuilt only when the fetched catalog's signature changes.
+# Tokens from the name weigh more than tokens from the category; fuzzy
+# matches go through a trigram index so typos still find a service.
+SEARCH_FIELD_WEIGHTS = (("name", 2.0), ("category", 1.0))
+SEARCH_MIN_SIMILARITY = 0.5
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", str(text).lower())
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def build_search_index(services):
+    tokens = {}
+    grams = {}
+    ids = {}
+    for pos, s in enumerate(services):
+        ids[str(s.get("service"))] = pos
+        for field, weight in SEARCH_FIELD_WEIGHTS:
+            for tok in tokenize(s.get(field, "")):
+                postings = tokens.setdefault(tok, {})
+                postings[pos] = max(postings.get(pos, 0.0), weight)
+    for tok in tokens:
+        for g in trigrams(tok):
+            grams.setdefault(g, []).append(tok)
+    return {"tokens": tokens, "grams": grams, "vocab": sorted(tokens), "ids": ids}
+
+def _match_terms(index, term):
+    matches = {}
+    if term in index["tokens"]:
+        matches[term] = 1.0
+    vocab = index["vocab"]
+    i = bisect.bisect_left(vocab, term)
+    while i < len(vocab) and vocab[i].startswith(term):
+        matches.setdefault(vocab[i], 0.75)
+        i += 1
+    term_grams = trigrams(term)
+    overlap = {}
+    for g in term_grams:
+        for tok in index["grams"].get(g, ()):
+            overlap[tok] = overlap.get(tok, 0) + 1
+    for tok, shared in overlap.items():
+        similarity = shared / max(len(term_grams), len(trigrams(tok)))
+        if similarity >= SEARCH_MIN_SIMILARITY:
+            matches.setdefault(tok, 0.5 * similarity)
+    return matches
+
+def search_services(api_key, query, max_rate=None, min_qty=None, max_qty=None, limit=20):
+    services = get_services(api_key)
+    cached = get_catalog(api_key)
+    if not cached:
+        return []
+    index = cached["index"]
+    scores = {}
+    if query.strip() in index["ids"]:
+        scores[index["ids"][query.strip()]] = 100.0
+    for term in tokenize(query):
+        for tok, strength in _match_terms(index, term).items():
+            for pos, weight in index["tokens"][tok].items():
+                scores[pos] = scores.get(pos, 0.0) + strength * weight
+    results = []
+    for pos, score in scores.items():
+        s = services[pos]
+        try:
+            if max_rate is not None and float(s.get("rate") or 0) > max_rate:
+                continue
+            if min_qty is not None and int(s.get("min") or 0) > min_qty:
+                continue
+            if max_qty is not None and int(s.get("max") or 0) < max_qty:
+                continue
+        except (TypeError, ValueError):
+            continue
+        results.append({**s, "score": round(score, 3)})
+    results.sort(key=lambda r: (-r["score"], float(r.get("rate") or 0)))
+    return results[:limit]
+
+# ================= USAGE STATS =================
+# Aggregates are kept per user in stats_<username>.json and updated in place
+# whenever an order is added or its status changes, so the dashboard never
+# has to scan the order history.
+REFUND_STATUSES = (Status.CANCELED, Status.REFUNDED)
+STATS_MAX_DAYS = 366
+STATS_MAX_TOP = 100
+
+def get_user_stats_file(username):
+    return f"stats_{username}.json"
+
+def empty_stats():
+    return {
+        "totals": {"usd": 0.0, "bdt": 0.0, "orders": 0},
+        "daily": {},
+        "services": {},
+        "links": {},
+        "status": {},
+        "automation": {}
+    }
+
+def rebuild_user_stats(username):
+    stats = empty_stats()
+    # Reads only: the orders are the shared cached objects
+    for o in load_user_orders(username):
+        add_order_to_stats(stats, o)
+        if o.refunded:
+            _book_refund(stats, o, o.refunded)
+    return stats
+
+def load_user_stats(username):
+    stats = load_cached(get_user_stats_file(username), None, lambda data: data)
+    if stats is None:
+        # Rebuilt once from the order log and saved, not on every call
+        with user_lock(username):
+            stats = load_cached(get_user_stats_file(username), None, lambda data: data)
+            if stats is None:
+                stats = rebuild_user_stats(username)
+                save_user_stats(username, stats)
+    return stats
+
+def save_user_stats(username, stats):
+    store_cached(get_user_stats_file(username), stats, stats)
+
+def _bump(buckets, key, usd=0.0, bdt=0.0, orders=0):
+    b = buckets.setdefault(key, {"usd": 0.0, "bdt": 0.0, "orders": 0})
+    b["usd"] = round(b["usd"] + usd, 6)
+    b["bdt"] = round(b["bdt"] + bdt, 4)
+    b["orders"] += orders
+
+def _spend_buckets(stats, order):
+    return [
+        (stats, "totals"),
+        (stats["daily"], datetime.fromtimestamp(order.created_at).date().isoformat()),
+        (stats["services"], str(order.service)),
+        (stats["links"], order.link)
+    ]
+
+def add_order_to_stats(stats, order, task_id=None):
+    for buckets, key in _spend_buckets(stats, order):
+        _bump(buckets, key, order.charge, order.charge_bdt, 1)
+    status = status_label(order.status)
+    stats["status"][status] = stats["status"].get(status, 0) + 1
+    if task_id:
+        stats["automation"][task_id] = stats["automation"].get(task_id, 0) + 1
+
+def _book_refund(stats, order, delta):
+    delta_bdt = order.charge_bdt * delta / order.charge if order.charge else 0.0
+    for buckets, key in _spend_buckets(stats, order):
+        _bump(buckets, key, -delta, -delta_bdt)
+
+def _apply_refund(stats, order, refund_usd):
+    delta = round(refund_usd - order.refunded, 6)
+    if not delta:
+        return
+    _book_refund(stats, order, delta)
+    order.refunded = round(refund_usd, 6)
+
+def apply_status_change(stats, order, status, remains):
+    old = status_label(order.status)
+    status = status_label(status)
+    if status != old:
+        if stats["status"].get(old, 0) > 1:
+            stats["status"][old] -= 1
+        else:
+            stats["status"].pop(old, None)
+        stats["status"][status] = stats["status"].get(status, 0) + 1
+        order.status = parse_status(status)
+    charge = order.charge
+    if order.status in REFUND_STATUSES:
+        refund = charge
+    elif order.status == Status.PARTIAL:
+        try:
+            refund = charge * min(float(remains) / order.quantity, 1.0)
+        except (TypeError, ValueError, ZeroDivisionError):
+            refund = 0.0
+    else:
+        refund = 0.0
+    _apply_refund(stats, order, refund)
+
+def record_new_order(username, order, task_id=None):
+    record_new_orders(username, [(order, task_id)])
+
+def record_new_orders(username, placed):
+    # placed: [(order, task_id or None)], written with one rewrite of each file
+    with user_lock(username):
+        stats = load_user_stats(username)
+        orders = load_user_orders(username)
+        for order, task_id in placed:
+            orders.append(order)
+            add_order_to_stats(stats, order, task_id)
+        save_user_orders(username, orders)
+        save_user_stats(username, stats)
 
 # ================= AUTHENTICATION ROUTES =================
 @app.route("/login", methods=["GET", "POST"])
@@ -140,8 +920,8 @@ def login():
         if user and user["password"] == hash_password(password):
             session["username"] = username
             return redirect(url_for("home"))
-        return render_template_string(LOGIN_PAGE, error="Invalid credentials")
-    return render_template_string(LOGIN_PAGE)
+        return render_template_string(login_page(), error="Invalid credentials")
+    return render_template_string(login_page())
 
 @app.route("/register", methods=["GET", "POST"])
 def register():
@@ -151,21 +931,25 @@ def register():
         api_key = request.form["api_key"]
         users = load_users()
         if username in users:
-            return render_template_string(REGISTER_PAGE, error="Username already exists")
+            return render_template_string(register_page(), error="Username already exists")
         # Test API key
         test = call_smm_api(api_key, "balance")
         if "error" in test or "balance" not in test:
-            return render_template_string(REGISTER_PAGE, error="Invalid API key or API not reachable")
+            return render_template_string(register_page(), error="Invalid API key or API not reachable")
         # Encrypt before storing
         encrypted_key = encrypt_api_key(api_key)
-        users[username] = {
-            "password": hash_password(password),
-            "api_key": encrypted_key,
-            "created": datetime.now().isoformat()
-        }
-        save_users(users)
+        with users_lock:
+            users = load_users()
+            if username in users:
+                return render_template_string(register_page(), error="Username already exists")
+            users[username] = {
+                "password": hash_password(password),
+                "api_key": encrypted_key,
+                "created": datetime.now().isoformat()
+            }
+            save_users(users)
         return redirect(url_for("login"))
-    return render_template_string(REGISTER_PAGE)
+    return render_template_string(register_page())
 
 @app.route("/logout")
 def logout():
@@ -177,7 +961,7 @@ def logout():
 def home():
     if "username" not in session:
         return redirect(url_for("login"))
-    return render_template_string(MAIN_PAGE, username=session["username"])
+    return render_template_string(main_page(), username=session["username"])
 
 # ================= API ROUTES (PROTECTED) =================
 @app.route("/init-data")
@@ -190,7 +974,7 @@ def init_data():
     api_key = decrypt_api_key(encrypted_key)
     try:
         balance_r = call_smm_api(api_key, "balance")
-        services_r = call_smm_api(api_key, "services")
+        services_r = get_services(api_key)
         return jsonify({
             "balance": balance_r.get("balance", "0.00"),
             "rate": get_live_rate(),
@@ -199,6 +983,24 @@ def init_data():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/services/search")
+def services_search():
+    if "username" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    username = session["username"]
+    users = load_users()
+    api_key = decrypt_api_key(users[username]["api_key"])
+    started = time.perf_counter()
+    results = search_services(
+        api_key,
+        request.args.get("q", ""),
+        max_rate=request.args.get("max_rate", type=float),
+        min_qty=request.args.get("min_qty", type=int),
+        max_qty=request.args.get("max_qty", type=int),
+        limit=request.args.get("limit", 20, type=int)
+    )
+    return jsonify({"results": results, "took_ms": round((time.perf_counter() - started) * 1000, 2)})
+
 @app.route("/analyze", methods=["POST"])
 def analyze():
     d = request.json
@@ -212,7 +1014,7 @@ def analyze():
     url = f"https://www.tiktok.com/@any/video/{video_id}"
     headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = http().get(url, headers=headers, timeout=15)
         match = re.search(r'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__".*?>(.*?)</script>', response.text)
         if not match:
             return jsonify({"error": "Data extraction failed"})
@@ -234,27 +1036,42 @@ def create_order():
         return jsonify({"error": "Not logged in"}), 401
     username = session["username"]
     users = load_users()
-    api_key = decrypt_api_key(users[username]["api_key"])
+    keys = get_user_provider_keys(users[username])
     d = request.json
-    payload = {
-        "service": d["service"],
-        "link": d["link"],
-        "quantity": d["quantity"]
-    }
-    r = call_smm_api(api_key, "add", **payload)
-    if "order" in r:
-        orders = load_user_orders(username)
-        orders.append({
-            "order_id": str(r["order"]),
-            "service": d["service"],
-            "link": d["link"],
-            "quantity": d["quantity"],
-            "status": "Pending",
-            "created_at": datetime.now().isoformat()
-        })
-        save_user_orders(username, orders)
+    # Validate before anything is placed upstream
+    try:
+        quantity = int(d["quantity"])
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Invalid quantity"}), 400
+    if quantity <= 0:
+        return jsonify({"error": "Invalid quantity"}), 400
+    r, provider, provider_service, order_id = place_order(keys, d["service"], d["link"], quantity)
+    if order_id:
+        charge, charge_bdt = price_order(keys[provider], provider_service, quantity, provider)
+        record_new_order(username, Order(
+            order_id, d["service"], d["link"], quantity,
+            provider=provider,
+            provider_service=provider_service,
+            provider_order_id=str(r["order"]),
+            charge=charge,
+            charge_bdt=charge_bdt
+        ))
+        r = {**r, "order": order_id, "provider": provider}
     return jsonify(r)
 
+HISTORY_CHUNK = 500  # rows per streamed chunk
+
+def history_rows(orders):
+    # Streams the response in chunks instead of building a second list of
+    # dicts for the whole history
+    yield "["
+    for start in range(0, len(orders), HISTORY_CHUNK):
+        chunk = [{"order_id": o.order_id, "status": status_label(o.status), "remains": o.remains or "0",
+                  "link": o.link, "service": o.service, "quantity": o.quantity}
+                 for o in orders[start:start + HISTORY_CHUNK]]
+        yield ("," if start else "") + json.dumps(chunk)[1:-1]
+    yield "]"
+
 @app.route("/history")
 def history():
     if "username" not in session:
@@ -263,21 +1080,64 @@ def history():
     orders = load_user_orders(username)
     if not orders:
         return jsonify([])
-    order_ids = [o["order_id"] for o in orders]
     users = load_users()
-    api_key = decrypt_api_key(users[username]["api_key"])
+    keys = get_user_provider_keys(users[username])
     try:
-        r = call_smm_api(api_key, "status", orders=",".join(order_ids))
-        for o in orders:
-            if o["order_id"] in r:
-                o["status"] = r[o["order_id"]].get("status", o["status"])
-                o["remains"] = r[o["order_id"]].get("remains", "0")
-        save_user_orders(username, orders)
-        return jsonify([{"order_id": o["order_id"], "status": o["status"], "remains": o.get("remains", "0"),
-                         "link": o["link"], "service": o["service"], "quantity": o["quantity"]} for o in orders])
+        # Finished orders don't change any more, only ask about the rest
+        r = fetch_order_statuses(keys, [o for o in orders if o.status not in FINISHED_STATUSES])
+        if r:
+            with user_lock(username):
+                orders = load_user_orders(username)
+                stats = load_user_stats(username)
+                changed = False
+                for o in orders:
+                    if o.order_id in r:
+                        remains = r[o.order_id].get("remains", "0")
+                        status = parse_status(r[o.order_id].get("status", o.status))
+                        if remains == o.remains and status == o.status:
+                            continue
+                        o.remains = remains
+                        apply_status_change(stats, o, status, remains)
+                        changed = True
+                if changed:
+                    save_user_orders(username, orders)
+                    save_user_stats(username, stats)
+        return app.response_class(history_rows(orders), mimetype="application/json")
     except Exception as e:
         return jsonify([])
 
+@app.route("/stats")
+def stats_dashboard():
+    if "username" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    username = session["username"]
+    days = min(max(request.args.get("days", 30, type=int), 1), STATS_MAX_DAYS)
+    top = min(max(request.args.get("top", 10, type=int), 1), STATS_MAX_TOP)
+    stats = load_user_stats(username)
+    today = datetime.now().date()
+    empty = {"usd": 0.0, "bdt": 0.0, "orders": 0}
+    daily = []
+    for i in range(days - 1, -1, -1):
+        day = (today - timedelta(days=i)).isoformat()
+        daily.append({"date": day, **stats["daily"].get(day, empty)})
+    def ranked(buckets):
+        items = sorted(buckets.items(), key=lambda kv: kv[1]["usd"], reverse=True)[:top]
+        return [{"key": k, **v} for k, v in items]
+    return jsonify({
+        "totals": stats["totals"],
+        "daily": daily,
+        "status": stats["status"],
+        "services": ranked(stats["services"]),
+        "links": ranked(stats["links"]),
+        "automation": stats["automation"]
+    })
+
+@app.route("/providers/health")
+def providers_health():
+    if "username" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    return jsonify({name: get_provider_health(name) for name in get_providers()})
+
 # ================= SETTINGS ROUTE =================
 @app.route("/settings", methods=["GET", "POST"])
 def settings():
@@ -289,18 +1149,30 @@ def settings():
     api_key = decrypt_api_key(encrypted_key)
     status = None
     if request.method == "POST":
+        provider = request.form.get("provider", DEFAULT_PROVIDER)
         new_api_key = request.form["api_key"]
-        test = call_smm_api(new_api_key, "balance")
-        if "error" in test or "balance" not in test:
+        test = call_smm_api(new_api_key, "balance", provider=provider) if provider in get_providers() else {}
+        if provider not in get_providers():
+            status = "Unknown provider"
+        elif "error" in test or "balance" not in test:
             status = "Invalid API key or API not reachable"
         else:
-            users[username]["api_key"] = encrypt_api_key(new_api_key)
-            save_users(users)
-            api_key = new_api_key
+            with users_lock:
+                users = load_users()
+                if provider == DEFAULT_PROVIDER:
+                    users[username]["api_key"] = encrypt_api_key(new_api_key)
+                    api_key = new_api_key
+                else:
+                    users[username].setdefault("providers", {})[provider] = encrypt_api_key(new_api_key)
+                save_users(users)
             status = "API key updated successfully"
     test = call_smm_api(api_key, "balance")
     connected = "balance" in test
-    return render_template_string(SETTINGS_PAGE, username=username, api_key=api_key, connected=connected, status=status)
+    user_providers = users[username].get("providers", {})
+    providers = [{"name": name, "configured": name == DEFAULT_PROVIDER or name in user_providers, **get_provider_health(name)}
+                 for name in get_providers()]
+    return render_template_string(settings_page(), username=username, api_key=api_key, connected=connected, status=status,
+                                  providers=providers, default_provider=DEFAULT_PROVIDER)
 
 # ================= AUTOMATION ROUTES =================
 @app.route("/automation/tasks", methods=["GET"])
@@ -309,7 +1181,7 @@ def get_automation_tasks():
         return jsonify({"error": "Not logged in"}), 401
     username = session["username"]
     tasks = load_user_automation(username)
-    return jsonify(tasks)
+    return jsonify([t.to_dict() for t in tasks])
 
 @app.route("/automation/add", methods=["POST"])
 def add_automation():
@@ -320,30 +1192,20 @@ def add_automation():
     order_id = data.get("order_id")
     target = int(data.get("target"))
     orders = load_user_orders(username)
-    order = next((o for o in orders if o["order_id"] == order_id), None)
+    order = next((o for o in orders if o.order_id == order_id), None)
     if not order:
         return jsonify({"error": "Order not found"}), 404
-    if order.get("status") != "Completed":
+    if order.status != Status.COMPLETED:
         return jsonify({"error": "Only completed orders can be automated"}), 400
 
-    tasks = load_user_automation(username)
-    if any(t.get("order_id") == order_id and t.get("active")):
-        return jsonify({"error": "This order is already being automated"}), 400
-
-    task = {
-        "order_id": order_id,
-        "service": order["service"],
-        "link": order["link"],
-        "quantity": order["quantity"],
-        "target": target,
-        "last_views": 0,
-        "last_order_time": None,
-        "active": True,
-        "created_at": datetime.now().isoformat()
-    }
-    tasks.append(task)
-    save_user_automation(username, tasks)
-    return jsonify({"success": True, "task": task})
+    task = Task(order_id, order.service, order.link, order.quantity, target)
+    with user_lock(username):
+        tasks = load_user_automation(username)
+        if any(t.order_id == order_id and t.active for t in tasks):
+            return jsonify({"error": "This order is already being automated"}), 400
+        tasks.append(task)
+        save_user_automation(username, tasks)
+    return jsonify({"success": True, "task": task.to_dict()})
 
 @app.route("/automation/remove", methods=["POST"])
 def remove_automation():
@@ -352,63 +1214,489 @@ def remove_automation():
     username = session["username"]
     data = request.json
     order_id = data.get("order_id")
-    tasks = load_user_automation(username)
-    tasks = [t for t in tasks if t.get("order_id") != order_id]
-    save_user_automation(username, tasks)
+    with user_lock(username):
+        tasks = load_user_automation(username)
+        tasks = [t for t in tasks if t.order_id != order_id]
+        save_user_automation(username, tasks)
     return jsonify({"success": True})
 
 # ================= BACKGROUND AUTOMATION WORKER =================
-def automation_worker():
-    while True:
-        time.sleep(AUTOMATION_INTERVAL)
-        users = load_users()
-        for username, user_data in users.items():
-            encrypted_key = user_data["api_key"]
-            api_key = decrypt_api_key(encrypted_key)
+def start_task_cooldown(username, task_id, views, ordered_at):
+    with user_lock(username):
+        tasks = load_user_automation(username)
+        for t in tasks:
+            if t.active and t.order_id == task_id:
+                t.last_views = views
+                t.last_order_time = ordered_at
+        save_user_automation(username, tasks)
+
+def record_task_order(username, order, task_id, views):
+    # A paid order and its task's cooldown are saved as soon as the order is
+    # placed, so a crash mid-pass neither loses the order nor lets the task
+    # re-order on restart. Stats follow in record_order_stats.
+    with user_lock(username):
+        orders = load_user_orders(username)
+        orders.append(order)
+        save_user_orders(username, orders)
+        start_task_cooldown(username, task_id, views, order.created_at)
+
+def record_order_stats(username, placed):
+    # placed: [(order, task_id)] already saved by record_task_order
+    with user_lock(username):
+        stats = load_cached(get_user_stats_file(username), None, lambda data: data)
+        if stats is None:
+            # Rebuilt from the order file, which already holds these orders
+            stats = rebuild_user_stats(username)
+            for _, task_id in placed:
+                stats["automation"][task_id] = stats["automation"].get(task_id, 0) + 1
+        else:
+            for order, task_id in placed:
+                add_order_to_stats(stats, order, task_id)
+        save_user_stats(username, stats)
+
+def process_user_tasks(username, user_data, due=None):
+    # Scraping and ordering happen outside the user's lock. Each placed order
+    # is saved right away; stats and finished tasks are merged back once per
+    # pass, serialized with the web routes.
+    # Returns {order_id: outcome} for every task that was looked at.
+    tasks = load_user_automation(username)
+    tasks = [t for t in tasks if t.runnable() and (due is None or t.order_id in due)]
+    if not tasks:
+        return {}
+    keys = get_user_provider_keys(user_data)
+    changes = {}
+    outcomes = {}
+    placed = []
+    try:
+        for task in tasks:
+            if task.last_order_time and now_ts() - task.last_order_time < ORDER_COOLDOWN:
+                outcomes[task.order_id] = {"wait_until": task.last_order_time + ORDER_COOLDOWN}
+                continue
+            views = get_video_views(task.link)
+            outcomes[task.order_id] = {"views": views}
+            if views is None:
+                continue
+            if views < task.target:
+                resp, provider, provider_service, order_id = place_order(keys, task.service, task.link, task.quantity)
+                if order_id:
+                    charge, charge_bdt = price_order(keys[provider], provider_service, task.quantity, provider)
+                    order = Order(
+                        order_id, task.service, task.link, task.quantity,
+                        provider=provider,
+                        provider_service=provider_service,
+                        provider_order_id=str(resp["order"]),
+                        charge=charge,
+                        charge_bdt=charge_bdt
+                    )
+                    record_task_order(username, order, task.order_id, views)
+                    placed.append((order, task.order_id))
+                    outcomes[task.order_id]["order"] = order_id
+                elif resp.get("outcome") == "unknown":
+                    # It may have gone through: wait out the cooldown before
+                    # ordering again
+                    start_task_cooldown(username, task.order_id, views, now_ts())
+                    outcomes[task.order_id]["wait_until"] = now_ts() + ORDER_COOLDOWN
+            else:
+                changes[task.order_id] = {"last_views": views, "active": False}
+                outcomes[task.order_id]["done"] = True
+    finally:
+        # Orders placed before an error still count
+        if placed:
+            record_order_stats(username, placed)
+    if changes:
+        with user_lock(username):
             tasks = load_user_automation(username)
-            if not tasks:
+            for t in tasks:
+                if t.active and t.order_id in changes:
+                    for field, value in changes[t.order_id].items():
+                        setattr(t, field, value)
+            save_user_automation(username, tasks)
+    return outcomes
+
+def shard_of(username, shards):
+    return zlib.crc32(username.encode()) % shards
+
+# ================= WORKER CHECKPOINTS =================
+# Each shard persists checkpoint_<shard>.json with, per "<username>/<order_id>"
+# task, its next due time, last observed views and in-flight order IDs. On
+# startup the schedule is rebuilt from every checkpoint file (so changing the
+# shard count is fine) and overdue tasks are spread over CATCHUP_WINDOW
+# instead of all being scraped at once. In memory, due times are also kept
+# in a heap so a pass only touches the tasks that are actually due; stale
+# heap items (rescheduled or removed tasks) are skipped when popped.
+IN_FLIGHT_LIMIT = 5  # most recent order IDs kept per task
+IN_FLIGHT_PRUNE_INTERVAL = 600  # seconds between checks against the order files
+
+def get_checkpoint_file(shard):
+    return f"checkpoint_{shard}.json"
+
+def load_checkpoint(shard=0, shards=1):
+    entries = {}
+    for path in glob.glob("checkpoint_*.json"):
+        data = read_json(path, {})
+        for key, entry in data.get("tasks", {}).items():
+            if shard_of(key.split("/", 1)[0], shards) != shard:
                 continue
-            updated = False
-            for task in tasks:
-                if not task.get("active"):
+            if key not in entries or entry.get("updated", 0) > entries[key].get("updated", 0):
+                entries[key] = entry
+    return entries
+
+def save_checkpoint(state):
+    with checkpoint_lock:
+        write_json(get_checkpoint_file(state["shard"]), {"saved_at": clock(), "tasks": state["entries"]},
+                   indent=None)
+    state["saved"] = clock()
+
+def schedule_task(state, key, due):
+    state["entries"][key]["next_due"] = due
+    heapq.heappush(state["heap"], (due, key))
+
+def new_worker_state(shard=0, shards=1, catch_up=True):
+    now = clock()
+    entries = load_checkpoint(shard, shards)
+    state = {
+        "shard": shard,
+        "shards": shards,
+        "catch_up": catch_up,
+        "entries": entries,
+        "heap": [],
+        "users": {},
+        "synced": 0,
+        "pruned": 0,
+        "saved": now
+    }
+    for key, entry in entries.items():
+        due = entry["next_due"]
+        if catch_up and due <= now:
+            due = now + random.uniform(0, CATCHUP_WINDOW)
+        schedule_task(state, key, due)
+    return state
+
+def sync_worker_tasks(state, now):
+    # Pick up tasks added or removed through the web routes and drop in-flight
+    # orders that have reached a final status.
+    first_sync = state["synced"] == 0
+    prune = now - state["pruned"] >= IN_FLIGHT_PRUNE_INTERVAL
+    entries = state["entries"]
+    users = {u: d for u, d in load_users().items() if shard_of(u, state["shards"]) == state["shard"]}
+    by_user = {}
+    for key, entry in entries.items():
+        by_user.setdefault(key.split("/", 1)[0], []).append(entry)
+    seen = set()
+    for username in users:
+        try:
+            for task in load_user_automation(username):
+                if not task.runnable():
                     continue
-                if task.get("last_order_time"):
-                    last = datetime.fromisoformat(task["last_order_time"])
-                    if datetime.now() - last < timedelta(minutes=10):
-                        continue
-                views = get_video_views(task["link"])
-                if views is None:
+                key = f"{username}/{task.order_id}"
+                seen.add(key)
+                if key in entries:
                     continue
-                task["last_views"] = views
-                if views < task["target"]:
-                    payload = {
-                        "service": task["service"],
-                        "link": task["link"],
-                        "quantity": task["quantity"]
-                    }
-                    resp = call_smm_api(api_key, "add", **payload)
-                    if "order" in resp:
-                        orders = load_user_orders(username)
-                        orders.append({
-                            "order_id": str(resp["order"]),
-                            "service": task["service"],
-                            "link": task["link"],
-                            "quantity": task["quantity"],
-                            "status": "Pending",
-                            "created_at": datetime.now().isoformat()
-                        })
-                        save_user_orders(username, orders)
-                        task["last_order_time"] = datetime.now().isoformat()
-                        updated = True
-                else:
-                    task["active"] = False
-                    updated = True
-            if updated:
-                save_user_automation(username, tasks)
+                due = now + random.uniform(0, CATCHUP_WINDOW) if first_sync and state["catch_up"] else now
+                if task.last_order_time:
+                    due = max(due, task.last_order_time + ORDER_COOLDOWN)
+                entries[key] = {"next_due": due, "last_views": task.last_views, "in_flight": [], "updated": now}
+                schedule_task(state, key, due)
+            in_flight = {o for e in by_user.get(username, ()) for o in e["in_flight"]} if prune else None
+            if in_flight:
+                finished = {o.order_id for o in load_user_orders(username)
+                            if o.order_id in in_flight and o.status in FINISHED_STATUSES}
+                for e in by_user[username]:
+                    e["in_flight"] = [o for o in e["in_flight"] if o not in finished]
+        except Exception:
+            # One broken account must not stop the shard; keep its schedule
+            # as it was and try again on the next sync
+            app.logger.exception("Could not sync automation tasks for %s", username)
+            seen.update(key for key in entries if key.split("/", 1)[0] == username)
+    for key in set(entries) - seen:
+        del entries[key]
+    state["users"] = users
+    state["synced"] = now
+    if prune:
+        state["pruned"] = now
+
+def next_wakeup(state):
+    # Earliest time the next pass has anything to do
+    heap = state["heap"]
+    wakeup = state["synced"] + AUTOMATION_INTERVAL
+    return min(heap[0][0], wakeup) if heap else wakeup
+
+def run_due_tasks(state, stop=None):
+    now = clock()
+    if now - state["synced"] >= AUTOMATION_INTERVAL:
+        sync_worker_tasks(state, now)
+    entries = state["entries"]
+    heap = state["heap"]
+    due = {}
+    lag = 0.0
+    total_lag = 0.0
+    while heap and heap[0][0] <= now:
+        due_at, key = heapq.heappop(heap)
+        entry = entries.get(key)
+        if entry is None or entry["next_due"] != due_at:
+            continue
+        username, order_id = key.split("/", 1)
+        due.setdefault(username, set()).add(order_id)
+        lag = max(lag, now - due_at)
+        total_lag += now - due_at
+    processed = 0
+    for username, order_ids in due.items():
+        if stop is not None and stop.is_set():
+            break
+        try:
+            outcomes = process_user_tasks(username, state["users"][username], order_ids)
+        except Exception:
+            app.logger.exception("Automation failed for %s", username)
+            outcomes = {}
+        finished = clock()
+        for order_id in order_ids:
+            key = f"{username}/{order_id}"
+            if key not in entries:
+                continue  # dropped by a sync while we were busy
+            outcome = outcomes.get(order_id)
+            if outcome is None:
+                # Inactive, removed or failed: look again on the next sync
+                schedule_task(state, key, finished + AUTOMATION_INTERVAL)
+            elif outcome.get("done"):
+                del entries[key]
+                continue
+            elif "wait_until" in outcome:
+                schedule_task(state, key, outcome["wait_until"])
+            elif "order" in outcome:
+                schedule_task(state, key, finished + ORDER_COOLDOWN)
+                entries[key]["in_flight"] = (entries[key]["in_flight"] + [outcome["order"]])[-IN_FLIGHT_LIMIT:]
+            else:
+                schedule_task(state, key, finished + AUTOMATION_INTERVAL)
+            if outcome and outcome.get("views") is not None:
+                entries[key]["last_views"] = outcome["views"]
+            entries[key]["updated"] = finished
+            processed += 1
+    if clock() - state["saved"] >= CHECKPOINT_INTERVAL:
+        save_checkpoint(state)
+    return {"users": len(due), "tasks": processed, "max_lag_seconds": round(lag, 3),
+            "total_lag_seconds": round(total_lag, 3)}
 
-if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
-    thread = threading.Thread(target=automation_worker, daemon=True)
-    thread.start()
+def automation_worker():
+    try:
+        check_data_files()
+    except Exception:
+        app.logger.exception("Data check failed")
+    state = None
+    while True:
+        # A failed pass is logged and retried; the thread must not die
+        try:
+            if state is None:
+                state = new_worker_state()
+            run_due_tasks(state)
+        except Exception:
+            app.logger.exception("Automation pass failed")
+        time.sleep(AUTOMATION_TICK)
+
+# ================= LAZY STARTUP =================
+_startup_lock = threading.Lock()
+_startup_done = False
+
+def ensure_started():
+    # Runs once, on the first request rather than at import time
+    global _startup_done
+    if _startup_done:
+        return
+    with _startup_lock:
+        if _startup_done:
+            return
+        # The full parse of every data file is left to the automation
+        # thread, worker.py or `python app.py --check-data`
+        with startup_stage("data check"):
+            check_data_files(full=False)
+        if AUTOMATION_MODE == "thread":
+            with startup_stage("automation thread"):
+                thread = threading.Thread(target=automation_worker, daemon=True)
+                thread.start()
+        _startup_done = True
+
+@app.before_request
+def lazy_startup():
+    ensure_started()
+
+# ================= REQUEST PROFILING =================
+# Admins can sample requests per route (Flask endpoint name) or per user at
+# runtime. A sampled request gets a cProfile call-stack profile plus a span
+# timeline of outbound HTTP, file I/O, template rendering, load_users and key
+# decryption. The span wrappers are only installed while at least one target
+# is enabled, so with profiling off nothing on the request path changes.
+ADMIN_USERS = {u.strip() for u in os.environ.get("ADMIN_USERS", "").split(",") if u.strip()}
+PROFILE_BUFFER_SIZE = 50
+PROFILE_TOP_FUNCTIONS = 40
+profile_targets = {}  # {"route:history": 0.25, "user:alice": 1.0}
+profiles = deque(maxlen=PROFILE_BUFFER_SIZE)
+_profile_ids = itertools.count(1)
+_profile_lock = threading.Lock()
+_profile_local = threading.local()
+_profiled_originals = {}
+
+def _span_detail(kind, args, kwargs):
+    if kind == "file":
+        return args[0] if args else kwargs.get("path")
+    if kind == "api":
+        return f"{kwargs.get('provider', DEFAULT_PROVIDER)} {args[1] if len(args) > 1 else kwargs.get('action')}"
+    if kind == "http":
+        # Method and URL without the query string, which may carry keys
+        return f"{args[0]} {str(args[1]).split('?')[0]}" if len(args) > 1 else None
+    return None
+
+def _traced(fn, kind):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        spans = getattr(_profile_local, "spans", None)
+        if spans is None:
+            return fn(*args, **kwargs)
+        span = {"kind": kind, "name": fn.__name__, "detail": _span_detail(kind, args, kwargs),
+                "depth": _profile_local.depth, "start_ms": round((time.perf_counter() - _profile_local.started) * 1000, 3)}
+        spans.append(span)
+        _profile_local.depth += 1
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            span["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            _profile_local.depth -= 1
+    wrapper.__wrapped_kind__ = kind
+    return wrapper
+
+PROFILED_FUNCTIONS = {
+    "read_json": "file",
+    "write_json": "file",
+    "load_users": "users",
+    "decrypt_api_key": "crypto",
+    "call_smm_api": "api",
+    "render_template_string": "template"
+}
+
+def _install_profiling():
+    if _profiled_originals:
+        return
+    module = globals()
+    for name, kind in PROFILED_FUNCTIONS.items():
+        _profiled_originals[name] = module[name]
+        module[name] = _traced(module[name], kind)
+    client = http()
+    client.request = _traced(client.request, "http")
+
+def _uninstall_profiling():
+    module = globals()
+    for name, fn in _profiled_originals.items():
+        module[name] = fn
+    _profiled_originals.clear()
+    if _http is not None:
+        _http.__dict__.pop("request", None)
+
+def set_profile_target(kind, name, rate):
+    with _profile_lock:
+        key = f"{kind}:{name}"
+        if rate > 0:
+            profile_targets[key] = min(rate, 1.0)
+            _install_profiling()
+        else:
+            profile_targets.pop(key, None)
+            if not profile_targets:
+                _uninstall_profiling()
+
+def is_admin():
+    return session.get("username") in ADMIN_USERS
+
+@app.before_request
+def start_profile():
+    if not profile_targets:
+        return
+    rate = max(profile_targets.get(f"route:{request.endpoint}", 0),
+               profile_targets.get(f"user:{session.get('username')}", 0))
+    if not rate or random.random() >= rate:
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiler is active on this thread
+        profiler = None
+    _profile_local.profiler = profiler
+    _profile_local.spans = []
+    _profile_local.depth = 0
+    _profile_local.started = time.perf_counter()
+    _profile_local.wall = now_ts()
+
+@app.after_request
+def finish_profile(response):
+    spans = getattr(_profile_local, "spans", None)
+    if spans is None:
+        return response
+    profiler = _profile_local.profiler
+    duration = (time.perf_counter() - _profile_local.started) * 1000
+    _profile_local.spans = None
+    stats = None
+    if profiler is not None:
+        profiler.disable()
+        import io
+        import pstats
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        stats = out.getvalue()
+    profiles.append({
+        "id": next(_profile_ids),
+        "route": request.endpoint,
+        "method": request.method,
+        "path": request.path,
+        "user": session.get("username"),
+        "status": response.status_code,
+        "created_at": format_timestamp(_profile_local.wall),
+        "duration_ms": round(duration, 3),
+        "by_kind_ms": {kind: round(sum(s["duration_ms"] for s in spans if s["kind"] == kind and "duration_ms" in s), 3)
+                       for kind in {s["kind"] for s in spans}},
+        "spans": spans,
+        "stats": stats
+    })
+    return response
+
+@app.teardown_request
+def abandon_profile(exc):
+    # after_request is skipped when a view raises; don't leak into the next request
+    if getattr(_profile_local, "spans", None) is not None:
+        _profile_local.spans = None
+        if _profile_local.profiler is not None:
+            _profile_local.profiler.disable()
+
+# ================= ADMIN PROFILING ROUTES =================
+@app.route("/admin/profiling", methods=["GET", "POST"])
+def admin_profiling():
+    if "username" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        if data.get("clear"):
+            profiles.clear()
+        for kind in ("route", "user"):
+            if data.get(kind):
+                try:
+                    rate = float(data.get("rate", 1.0))
+                except (TypeError, ValueError):
+                    return jsonify({"error": "Invalid rate"}), 400
+                set_profile_target(kind, data[kind], rate)
+    return jsonify({
+        "targets": dict(profile_targets),
+        "profiles": [{k: v for k, v in p.items() if k not in ("spans", "stats")} for p in reversed(profiles)]
+    })
+
+@app.route("/admin/profiling/<int:profile_id>")
+def admin_profile(profile_id):
+    if "username" not in session:
+        return jsonify({"error": "Not logged in"}), 401
+    if not is_admin():
+        return jsonify({"error": "Forbidden"}), 403
+    for p in profiles:
+        if p["id"] == profile_id:
+            return jsonify(p)
+    return jsonify({"error": "Profile not found"}), 404
 
 # ================= IMPROVED UI TEMPLATES =================
 BASE_CSS = """
@@ -540,7 +1828,10 @@ BASE_CSS = """
     @keyframes spin { 0% { transform: rotate(0deg); } 100% { transform: rotate(360deg); } }
 """
 
-LOGIN_PAGE = f"""
+@functools.lru_cache(maxsize=None)
+def login_page():
+    with startup_stage("template login_page"):
+        return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -565,7 +1856,10 @@ LOGIN_PAGE = f"""
 </html>
 """
 
-REGISTER_PAGE = f"""
+@functools.lru_cache(maxsize=None)
+def register_page():
+    with startup_stage("template register_page"):
+        return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -591,7 +1885,10 @@ REGISTER_PAGE = f"""
 </html>
 """
 
-SETTINGS_PAGE = f"""
+@functools.lru_cache(maxsize=None)
+def settings_page():
+    with startup_stage("template settings_page"):
+        return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -612,6 +1909,23 @@ SETTINGS_PAGE = f"""
                 <input type="text" name="api_key" value="{{{{ api_key }}}}" required>
                 <button type="submit">Update API Key</button>
             </form>
+        </div>
+        <div class="glass-card">
+            <h3>🔀 Providers</h3>
+            <table>
+                <tr><th>Provider</th><th>Key</th><th>Latency</th><th>Errors</th></tr>
+                {{% for p in providers %}}
+                <tr><td>{{{{ p.name }}}}</td><td>{{% if p.configured %}}✅{{% else %}}—{{% endif %}}</td><td>{{{{ p.latency }}}}s</td><td>{{{{ (p.error_rate * 100)|round|int }}}}%</td></tr>
+                {{% endfor %}}
+            </table>
+            <form method="post" style="margin-top: 15px;">
+                <label>Add Provider Key</label>
+                <select name="provider">
+                    {{% for p in providers if p.name != default_provider %}}<option value="{{{{ p.name }}}}">{{{{ p.name }}}}</option>{{% endfor %}}
+                </select>
+                <input type="text" name="api_key" placeholder="Provider API Key" required>
+                <button type="submit">Save Provider Key</button>
+            </form>
             <p style="margin-top: 20px;"><a href="/">⬅ Back to Panel</a> | <a href="/logout">Logout</a></p>
         </div>
     </div>
@@ -619,7 +1933,10 @@ SETTINGS_PAGE = f"""
 </html>
 """
 
-MAIN_PAGE = f"""
+@functools.lru_cache(maxsize=None)
+def main_page():
+    with startup_stage("template main_page"):
+        return f"""
 <!DOCTYPE html>
 <html>
 <head>
@@ -660,6 +1977,7 @@ MAIN_PAGE = f"""
 
         <div class="glass-card">
             <h3>📦 Place New Order</h3>
+            <input type="text" id="serSearch" placeholder="🔍 Search services by name, category or ID" oninput="searchServices()">
             <label>1. Platform</label>
             <select id="platSelect" onchange="filterCategories()">
                 <option value="">Select Platform</option>
@@ -759,6 +2077,20 @@ MAIN_PAGE = f"""
         updateCalc();
     }}
 
+    let searchTimer = null;
+    function searchServices() {{
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(async () => {{
+            const q = document.getElementById("serSearch").value.trim();
+            if (!q) return filterServices();
+            const r = await fetch("/services/search?q=" + encodeURIComponent(q));
+            const d = await r.json();
+            document.getElementById("serSelect").innerHTML = '<option value="">-- Choose Service --</option>' +
+                (d.results || []).map(s => `<option value="${{s.service}}" data-rate="${{s.rate}}">${{s.name}} ($${{s.rate}}/1k)</option>`).join('');
+            updateCalc();
+        }}, 250);
+    }}
+
     function updateCalc() {{
         const qty = document.getElementById("oQty").value || 0;
         const selected = document.getElementById("serSelect").selectedOptions[0];
@@ -890,5 +2222,21 @@ MAIN_PAGE = f"""
 </html>
 """
 
+startup_timings.append(("module import", (time.perf_counter() - _module_started) * 1e6))
+if STARTUP_BUDGET_MS and startup_timings[-1][1] / 1000 > STARTUP_BUDGET_MS:
+    app.logger.warning("Import exceeded STARTUP_BUDGET_MS=%s\n%s", STARTUP_BUDGET_MS, startup_report())
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=4000, debug=True)
\ No newline at end of file
+    if "--startup-report" in sys.argv:
+        # Force every lazy stage once so their cost shows up in the report
+        get_cipher()
+        http()
+        for page in (login_page, register_page, settings_page, main_page):
+            page()
+        with startup_stage("data check"):
+            check_data_files(full=False)
+        print(startup_report())
+    elif "--check-data" in sys.argv:
+        check_data_files()
+    else:
+        app.run(host="0.0.0.0", port=4000, debug=True)
\ No newline at end of file
@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("AUTOMATION_MODE", "external")
+
+import app
+
+# End-to-end cost of the order/task storage on a large synthetic account:
+# /history through the Flask test client and automation worker passes, with
+# every load and save against real files. Providers and TikTok are faked.
+# --against runs the same scenarios on app.py from another git revision:
+#   python bench_models.py --orders 100000 --tasks 10000 --against 61feb4b
+
+USERNAME = "bench"
+
+def load_revision(rev):
+    here = os.path.dirname(os.path.abspath(__file__))
+    source = subprocess.run(["git", "show", f"{rev}:app.py"], cwd=here, capture_output=True, text=True,
+                            check=True).stdout
+    module = types.ModuleType(f"app_{rev}")
+    module.__file__ = os.path.join(here, "app.py")
+    exec(compile(source, f"app.py@{rev}", "exec"), module.__dict__)
+    return module
+
+def write_account(args):
+    start = datetime(2025, 1, 1)
+    now = datetime.now()
+    orders = [{
+        "order_id": str(1000000 + i),
+        "service": random.randint(1, 3000),
+        "link": f"https://www.tiktok.com/@user/video/{7300000000000000000 + i}",
+        "quantity": random.choice([100, 500, 1000, 5000]),
+        "status": "Pending" if random.random() < args.pending else "Completed",
+        "remains": "0",
+        "charge": 0.5,
+        "charge_bdt": 61.0,
+        "created_at": (start + timedelta(seconds=i * 37)).isoformat()
+    } for i in range(args.orders)]
+    # The first tasks are past their cooldown, one batch per measured pass
+    overdue = args.due * args.repeat
+    tasks = [{
+        "order_id": o["order_id"],
+        "service": o["service"],
+        "link": o["link"],
+        "quantity": o["quantity"],
+        "target": 100000,
+        "last_views": 0,
+        "last_order_time": (now - timedelta(hours=1) if i < overdue else now).isoformat(),
+        "active": True,
+        "created_at": o["created_at"]
+    } for i, o in enumerate(orders[:args.tasks])]
+    with open(f"orders_{USERNAME}.json", "w") as f:
+        json.dump(orders, f, indent=2)
+    with open(f"automation_{USERNAME}.json", "w") as f:
+        json.dump(tasks, f, indent=2)
+    with open("users.json", "w") as f:
+        json.dump({USERNAME: {"password": "", "api_key": "key", "created": now.isoformat()}}, f)
+    return [t["order_id"] for t in tasks]
+
+def install_fakes(mod):
+    next_order = iter(range(9000000, sys.maxsize))
+
+    def call_smm_api(api_key, action, provider=mod.DEFAULT_PROVIDER, **params):
+        if action == "status":
+            return {i: {"status": "Completed", "remains": "0"} for i in params["orders"].split(",")}
+        if action == "services":
+            return [{"service": 1, "name": "TikTok Views", "category": "TikTok", "rate": "0.05", "min": "100", "max": "1000000"}]
+        if action == "add":
+            return {"order": next(next_order)}
+        return {"balance": "100"}
+
+    mod.call_smm_api = call_smm_api
+    mod.decrypt_api_key = lambda key: key
+    mod.get_live_rate = lambda: 120.0
+    mod.get_video_views = lambda link: 0
+
+def measure(fn):
+    # Timed without tracemalloc, which would dominate the CPU numbers
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def run_scenarios(mod, args):
+    os.chdir(tempfile.mkdtemp(prefix="smm-bench-"))
+    random.seed(0)
+    task_ids = write_account(args)
+    install_fakes(mod)
+    mod.ensure_started()
+    user_data = mod.load_users()[USERNAME]
+    client = mod.app.test_client()
+    with client.session_transaction() as s:
+        s["username"] = USERNAME
+
+    def history():
+        body = client.get("/history").get_data()
+        assert body.startswith(b"[")
+
+    due_batches = iter([set(task_ids[i:i + args.due]) for i in range(0, args.due * args.repeat * 2, args.due)])
+    cooling = set(task_ids[-args.due:])
+
+    rows = []
+    for name, fn in (("/history", history),
+                     ("worker pass, nothing due", lambda: mod.process_user_tasks(USERNAME, user_data, cooling)),
+                     (f"worker pass, {args.due} re-orders",
+                      lambda: mod.process_user_tasks(USERNAME, user_data, next(due_batches)))):
+        times = []
+        peak = 0
+        for _ in range(args.repeat):
+            elapsed, p = measure(fn)
+            times.append(elapsed)
+            peak = max(peak, p)
+        rows.append((name, times[0], sum(times[1:]) / max(len(times) - 1, 1), peak))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark order/task storage end to end.")
+    parser.add_argument("--orders", type=int, default=100000)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--pending", type=float, default=0.02, help="share of orders not yet finished")
+    parser.add_argument("--due", type=int, default=10, help="tasks due in a re-order pass")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scenario; the first is cold")
+    parser.add_argument("--against", help="git revision of app.py to compare with")
+    args = parser.parse_args(argv)
+
+    versions = [("current", app)]
+    if args.against:
+        versions.insert(0, (args.against, load_revision(args.against)))
+    print(f"{args.orders} orders, {args.tasks} tasks, {args.repeat} runs per scenario")
+    print(f"{'version':<10} {'scenario':<28} {'cold [ms]':>10} {'warm [ms]':>10} {'peak [MB]':>10}")
+    for label, mod in versions:
+        for name, cold, warm, peak in run_scenarios(mod, args):
+            print(f"{label:<10} {name:<28} {cold * 1000:>10.1f} {warm * 1000:>10.1f} {peak / 2**20:>10.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import os
+import sys
+import math
+import time
+import random
+import argparse
+import tempfile
+
+os.environ.setdefault("AUTOMATION_MODE", "external")
+
+import app
+
+# Drives the real automation scheduler (new_worker_state / run_due_tasks /
+# process_user_tasks) against a virtual clock, synthetic TikTok view curves,
+# a fake SMM provider and in-memory storage, so days of operation run in
+# seconds without touching the network or spending balance:
+#   python simulate.py --tasks 10000 --users 1000 --days 2 --shards 16
+
+# ================= VIRTUAL CLOCK =================
+class VirtualClock:
+    def __init__(self, start):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+# ================= SYNTHETIC WORLD =================
+class Video:
+    __slots__ = ("born", "organic_peak", "organic_tau", "deliveries")
+
+    def __init__(self, born, organic_peak, organic_tau):
+        self.born = born
+        self.organic_peak = organic_peak
+        self.organic_tau = organic_tau
+        self.deliveries = []  # (placed_at, quantity)
+
+    def views(self, now, delivery_seconds):
+        organic = self.organic_peak * (1 - math.exp(-(now - self.born) / self.organic_tau))
+        bought = sum(q * min(max(now - placed, 0) / delivery_seconds, 1.0) for placed, q in self.deliveries)
+        return int(organic + bought)
+
+class World:
+    def __init__(self, args, clock):
+        self.args = args
+        self.clock = clock
+        self.videos = {}
+        self.next_order = 1
+        self.orders = 0
+        self.spend = 0.0
+        self.scrapes = 0
+        self.failed_scrapes = 0
+        self.failed_orders = 0
+        self.api_calls = 0
+
+    def add_video(self, link):
+        self.videos[link] = Video(
+            self.clock() - random.uniform(0, 86400),
+            random.lognormvariate(math.log(self.args.organic_views), 1.0),
+            random.uniform(6, 72) * 3600
+        )
+
+    def get_video_views(self, link):
+        self.scrapes += 1
+        self.clock.advance(random.expovariate(1 / self.args.scrape_latency))
+        if random.random() < self.args.scrape_failure:
+            self.failed_scrapes += 1
+            return None
+        return self.videos[link].views(self.clock(), self.args.delivery_hours * 3600)
+
+    def call_smm_api(self, api_key, action, provider=app.DEFAULT_PROVIDER, **params):
+        self.api_calls += 1
+        self.clock.advance(random.expovariate(1 / self.args.api_latency))
+        app.record_provider_call(provider, self.args.api_latency, True)
+        if action == "services":
+            return [{"service": 1, "name": "TikTok Views", "category": "TikTok Views",
+                     "rate": str(self.args.rate), "min": "100", "max": "1000000"}]
+        if action == "balance":
+            return {"balance": "1000000", "currency": "USD"}
+        if action == "add":
+            if random.random() < self.args.order_failure:
+                self.failed_orders += 1
+                return {"error": "Service temporarily unavailable"}
+            order_id = self.next_order
+            self.next_order += 1
+            self.orders += 1
+            self.spend += self.args.rate * int(params["quantity"]) / 1000
+            self.videos[params["link"]].deliveries.append((self.clock(), int(params["quantity"])))
+            return {"order": order_id}
+        return {"error": "Unsupported action"}
+
+# ================= IN-MEMORY STORAGE =================
+def install_memory_store():
+    store = {}
+
+    def read_json(path, default):
+        return store.get(path, default)
+
+    def write_json(path, data, indent=2):
+        store[path] = data
+
+    app.read_json = read_json
+    app.write_json = write_json
+    return store
+
+def seed_accounts(args, world):
+    users = {}
+    for u in range(args.users):
+        users[f"user{u}"] = {"password": "", "api_key": f"key{u}", "created": ""}
+    app.save_users(users)
+    now = app.now_ts()
+    for u in range(args.users):
+        tasks = []
+        for i in range(args.tasks // args.users + (1 if u < args.tasks % args.users else 0)):
+            link = f"https://www.tiktok.com/@user{u}/video/{i}"
+            world.add_video(link)
+            tasks.append(app.Task(f"{u}-{i}", 1, link, args.quantity, args.target, created_at=now))
+        app.save_user_automation(f"user{u}", tasks)
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+# ================= MAIN =================
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Simulate the automation engine on a virtual clock.")
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    # workload
+    parser.add_argument("--target", type=int, default=20000, help="target views per task")
+    parser.add_argument("--quantity", type=int, default=1000, help="views bought per re-order")
+    parser.add_argument("--rate", type=float, default=0.05, help="provider price in USD per 1000")
+    parser.add_argument("--organic-views", type=float, default=5000, help="median organic views per video")
+    parser.add_argument("--delivery-hours", type=float, default=2.0)
+    parser.add_argument("--scrape-latency", type=float, default=1.0, help="mean seconds per TikTok scrape")
+    parser.add_argument("--api-latency", type=float, default=0.5, help="mean seconds per SMM API call")
+    parser.add_argument("--scrape-failure", type=float, default=0.05)
+    parser.add_argument("--order-failure", type=float, default=0.02)
+    # scheduling policy
+    parser.add_argument("--shards", type=int, default=1, help="worker shard processes to model")
+    parser.add_argument("--tick", type=float, default=app.AUTOMATION_TICK)
+    parser.add_argument("--interval", type=float, default=app.AUTOMATION_INTERVAL)
+    parser.add_argument("--cooldown", type=int, default=app.ORDER_COOLDOWN)
+    parser.add_argument("--catchup", type=float, default=app.CATCHUP_WINDOW)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    random.seed(args.seed)
+    os.chdir(tempfile.mkdtemp(prefix="smm-sim-"))
+
+    clock = VirtualClock(time.time())
+    world = World(args, clock)
+    app.clock = clock
+    app.get_video_views = world.get_video_views
+    app.call_smm_api = world.call_smm_api
+    app.decrypt_api_key = lambda key: key
+    app.get_live_rate = lambda: 120.0
+    app.AUTOMATION_INTERVAL = args.interval
+    app.ORDER_COOLDOWN = args.cooldown
+    app.CATCHUP_WINDOW = args.catchup
+    install_memory_store()
+    seed_accounts(args, world)
+
+    # Shards run in parallel in reality: each keeps its own virtual time and
+    # the shard that is furthest behind always runs next
+    started_wall = time.perf_counter()
+    started = clock()
+    end = started + args.days * 86400
+    shards = [{"state": app.new_worker_state(i, args.shards), "time": started} for i in range(args.shards)]
+    passes = 0
+    processed = 0
+    total_lag = 0.0
+    pass_lags = []
+    while True:
+        shard = min(shards, key=lambda s: s["time"])
+        if shard["time"] >= end:
+            break
+        clock.now = shard["time"]
+        result = app.run_due_tasks(shard["state"])
+        passes += 1
+        processed += result["tasks"]
+        total_lag += result["total_lag_seconds"]
+        if result["tasks"]:
+            pass_lags.append(result["max_lag_seconds"])
+        # Sleep one tick, skipping ahead over ticks that would find nothing due
+        wakeup = app.next_wakeup(shard["state"])
+        ticks = max(1, math.ceil((wakeup - clock()) / args.tick))
+        shard["time"] = clock() + ticks * args.tick
+    wall = time.perf_counter() - started_wall
+
+    completed = sum(1 for u in app.load_users() for t in app.load_user_automation(u) if not t.active)
+    print(f"simulated {args.days} days, {args.tasks} tasks over {args.users} users in {wall:.1f}s wall time")
+    print(f"  policy: {args.shards} shards, tick {args.tick}s, interval {args.interval}s, cooldown {args.cooldown}s, catch-up {args.catchup}s")
+    print(f"  orders placed      {world.orders} ({world.failed_orders} failed)")
+    print(f"  spend              ${world.spend:.2f}")
+    print(f"  scrapes            {world.scrapes} ({world.failed_scrapes} failed)")
+    print(f"  tasks completed    {completed}/{args.tasks}")
+    print(f"  task runs          {processed} in {passes} scheduler passes")
+    print(f"  scheduler latency  mean {total_lag / processed if processed else 0:.1f}s, "
+          f"p95 pass max {percentile(pass_lags, 0.95):.1f}s, max {max(pass_lags, default=0):.1f}s")
+    print(f"  throughput         {processed / wall if wall else 0:.0f} task runs per wall second")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
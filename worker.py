@@ -0,0 +1,86 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import multiprocessing
+from queue import Empty
+
+# The web process must not start its own automation thread when we import it
+os.environ.setdefault("AUTOMATION_MODE", "external")
+
+import app
+
+# ================= SHARD PROCESS =================
+def run_shard(shard, shards, tick, once, stop, reports):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    # --once is driven by an external schedule, so run whatever is due now
+    # instead of spreading it over the catch-up window
+    state = app.new_worker_state(shard, shards, catch_up=not once)
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            result = app.run_due_tasks(state, stop)
+        except Exception:
+            app.app.logger.exception("Shard %s pass failed", shard)
+            if once:
+                break
+            stop.wait(tick)
+            continue
+        if result["tasks"] or once:
+            reports.put({"shard": shard, "cycle_seconds": round(time.perf_counter() - started, 3), **result})
+        if once:
+            break
+        stop.wait(tick)
+    app.save_checkpoint(state)
+
+# ================= SUPERVISOR =================
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Run the SMM panel automation worker.")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="number of shard processes (default: CPU count)")
+    parser.add_argument("--tick", type=float, default=app.AUTOMATION_TICK,
+                        help="seconds between scheduler passes of a shard")
+    parser.add_argument("--once", action="store_true",
+                        help="run a single cycle per shard and exit (for cron / serverless schedulers)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    app.check_data_files()
+    shards = max(args.processes, 1)
+    stop = multiprocessing.Event()
+    reports = multiprocessing.Queue()
+
+    def shutdown(signum, frame):
+        print(f"Received signal {signum}, finishing current cycle...", flush=True)
+        stop.set()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    procs = [
+        multiprocessing.Process(target=run_shard, args=(i, shards, args.tick, args.once, stop, reports),
+                                name=f"shard-{i}")
+        for i in range(shards)
+    ]
+    for p in procs:
+        p.start()
+
+    started = time.perf_counter()
+    while any(p.is_alive() for p in procs) or not reports.empty():
+        try:
+            r = reports.get(timeout=1)
+        except Empty:
+            continue
+        print(f"shard {r['shard']}/{shards}: {r['tasks']} tasks for {r['users']} users in {r['cycle_seconds']}s "
+              f"(max lag {r['max_lag_seconds']}s)", flush=True)
+    for p in procs:
+        p.join()
+    if args.once:
+        print(f"all shards done in {time.perf_counter() - started:.3f}s", flush=True)
+    return 0 if all(p.exitcode == 0 for p in procs) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())